@@ -11,6 +11,13 @@ class AbilityAction:
     An attack action from one character to an object
     """
 
+    __slots__ = (
+        "executing_character_id",
+        "character_id_target",
+        "positional_target",
+        "type",
+    )
+
     executing_character_id: str
     character_id_target: Optional[int]
     positional_target: Optional[Position]
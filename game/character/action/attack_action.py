@@ -9,6 +9,8 @@ class AttackAction:
     An attack action from one character to an object
     """
 
+    __slots__ = ("executing_character_id", "attacking_id", "type")
+
     executing_character_id: str
     attacking_id: str
     type: AttackActionType
@@ -10,6 +10,8 @@ class MoveAction:
     Defines where a character will move
     """
 
+    __slots__ = ("executing_character_id", "destination")
+
     executing_character_id: str
     destination: Position
 
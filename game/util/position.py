@@ -9,6 +9,8 @@ class Position:
     Represents a position in a two-dimensional space
     """
 
+    __slots__ = ("x", "y")
+
     x: int
     y: int
 
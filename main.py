@@ -1,13 +1,12 @@
 import argparse
 from datetime import datetime
 from enum import Enum
-import json
+import logging
 import os
 import subprocess
 import threading
 import time
-import traceback
-from typing import IO
+from typing import IO, Callable
 import engine
 import sys
 from game.character.action.ability_action import AbilityAction
@@ -17,8 +16,12 @@ from game.character.character_class_type import CharacterClassType
 from game.game_state import GameState
 
 from network.client import Client
-from network.received_message import ReceivedMessage
+from network.json_codec import fastest_decoder, json_dumps
+from network.received_message import ReceivedMessage, decode_raw_received_message
 from strategy.choose_strategy import choose_strategy
+from strategy.strategy import Strategy
+
+logger = logging.getLogger(__name__)
 
 raw_debug_env = os.environ.get("DEBUG")
 DEBUG = raw_debug_env == "1" or raw_debug_env == "true"
@@ -38,19 +41,22 @@ class RunOpponent(Enum):
     ZOMBIE_COMPUTER = "zombieComputer"
 
 
+# Serve bots with the same interpreter that was used to run, so `pypy3 main.py run ...` serves under PyPy
+PYTHON = f'"{sys.executable}"' if sys.executable else "python"
+
 COMMANDS_FOR_OPPONENT: dict[RunOpponent, list[tuple[str, str]]] = {
     RunOpponent.SELF: [
         ("Engine", "java -jar engine/engine.jar 9001 9002"),
-        ("Human", "python main.py serve 9001"),
-        ("Zombie", "python main.py serve 9002"),
+        ("Human", f"{PYTHON} main.py serve 9001"),
+        ("Zombie", f"{PYTHON} main.py serve 9002"),
     ],
     RunOpponent.HUMAN_COMPUTER: [
         ("Engine", "java -jar engine/engine.jar 0 9002"),
-        ("Zombie", "python main.py serve 9002"),
+        ("Zombie", f"{PYTHON} main.py serve 9002"),
     ],
     RunOpponent.ZOMBIE_COMPUTER: [
         ("Engine", "java -jar engine/engine.jar 9001 0"),
-        ("Human", "python main.py serve 9001"),
+        ("Human", f"{PYTHON} main.py serve 9001"),
     ],
 }
 
@@ -155,6 +161,110 @@ def run(opponent: RunOpponent):
     )
 
 
+def handle_choose_classes(
+    received_message: ReceivedMessage, strategy: Strategy
+) -> bytes:
+    message = received_message.message
+    raw_possible_classes: list = message["choices"]
+    possible_classes: list[CharacterClassType] = [
+        CharacterClassType[x] for x in raw_possible_classes
+    ]
+    num_to_pick = message["numToPick"]
+    max_per_same_class = message["maxPerSameClass"]
+
+    raw_output = strategy.decide_character_classes(
+        possible_classes, num_to_pick, max_per_same_class
+    )
+
+    if raw_output == None:
+        raise RuntimeError(
+            "Your decide_character_classes strategy returned nothing (None)!"
+        )
+
+    return json_dumps({class_type.value: num for class_type, num in raw_output.items()})
+
+
+# Maps each action phase to the message key of its possible actions, how to deserialize
+# and serialize those actions, and the strategy method that decides between them
+ACTION_PHASES: dict[str, tuple[str, Callable, Callable, str]] = {
+    "MOVE": (
+        "possibleMoves",
+        MoveAction.deserialize,
+        MoveAction.serialize,
+        "decide_moves",
+    ),
+    "ATTACK": (
+        "possibleAttacks",
+        AttackAction.deserialize,
+        AttackAction.serialize,
+        "decide_attacks",
+    ),
+    "ABILITY": (
+        "possibleAbilities",
+        AbilityAction.deserialize,
+        AbilityAction.serialize,
+        "decide_abilities",
+    ),
+}
+
+
+def handle_actions(received_message: ReceivedMessage, strategy: Strategy) -> bytes:
+    key, deserialize, serialize, decide_method = ACTION_PHASES[received_message.phase]
+    message = received_message.message
+    raw_possible_actions: dict = message[key]
+
+    possible_actions: dict[str, list] = {
+        id: [deserialize(possible) for possible in possibles]
+        for [id, possibles] in raw_possible_actions.items()
+    }
+
+    game_state = GameState.deserialize(message)
+    output = getattr(strategy, decide_method)(possible_actions, game_state)
+
+    if output == None:
+        raise RuntimeError(f"Your {decide_method} strategy returned nothing (None)!")
+
+    return json_dumps(output, default=serialize)
+
+
+def format_game_summary(received_message: ReceivedMessage) -> str:
+    is_zombie = received_message.is_zombie
+    message = received_message.message
+    humans_score = message["scores"]["humans"]
+    zombies_score = message["scores"]["zombies"]
+    humans_left = message["stats"]["humansLeft"]
+    zombies_left = message["stats"]["zombiesLeft"]
+    turn = message["stats"]["turns"]
+    errors = message["errors"]
+    your_errors = errors["zombieErrors" if is_zombie else "humanErrors"]
+    formatted_errors = "\n".join(your_errors)
+    formatted_errors_message = (
+        f"Your bot had {len(your_errors)} errors:\n{formatted_errors}"
+        if len(your_errors) > 0
+        else "Your bot had no errors."
+    )
+
+    return "\n".join(
+        (
+            "",
+            formatted_errors_message,
+            "",
+            f"Finished game on turn {turn} with {humans_left} humans and {zombies_left} zombies.",
+            f"Score: {humans_score}-{zombies_score} (H-Z). You were the {'humans' if not is_zombie else 'zombies'}.",
+            "",
+        )
+    )
+
+
+# Maps each playing phase to the handler that builds the response to send back
+PHASE_HANDLERS: dict[str, Callable[[ReceivedMessage, Strategy], bytes]] = {
+    "CHOOSE_CLASSES": handle_choose_classes,
+    "MOVE": handle_actions,
+    "ATTACK": handle_actions,
+    "ABILITY": handle_actions,
+}
+
+
 def serve(port: int):
     print(f"Connecting to server on port {port}...")
 
@@ -164,147 +274,57 @@ def serve(port: int):
 
     print(f"Connected to server on port {port}")
 
-    while True:
-        raw_received = client.read()
-
-        if raw_received:
-            try:
-                received = json.loads(raw_received)
+    # is_zombie never changes over a connection, so the strategy only needs to be chosen once
+    strategy = None
+    finish_message = None
+    # Only used without msgspec, picked using the first message since the fastest depends on message sizes
+    json_loads = None
+
+    for raw_received in client.frames():
+        try:
+            if decode_raw_received_message:
+                received_message = ReceivedMessage.decode(raw_received)
+            else:
+                if json_loads is None:
+                    json_loads = fastest_decoder(raw_received)
+
+                received = json_loads(raw_received)
                 received_message = ReceivedMessage.deserialize(received)
-                is_zombie = received_message.is_zombie
-                phase = received_message.phase
-                message = received_message.message
-                turn = message["turn"]
+            is_zombie = received_message.is_zombie
+            phase = received_message.phase
+            turn = received_message.turn
+
+            if phase == "FINISH":
+                finish_message = received_message
+                break
+
+            handler = PHASE_HANDLERS.get(phase)
+
+            if handler is None:
+                raise RuntimeError(f"Unknown phase type {phase}")
+
+            if DEBUG:
+                print(f"[TURN {turn}]: Getting your bot's response to {phase} phase...")
+            if strategy is None:
+                strategy = choose_strategy(is_zombie)
+
+            response = handler(received_message, strategy)
+        except Exception:
+            logger.exception("Something went wrong running your bot")
+            client.write(b"null")
+            continue
+
+        client.write(response)
+
+        if DEBUG:
+            print(f"[TURN {turn}]: Send response to {phase} phase to server!")
 
-                if phase != "CHOOSE_CLASSES" and phase != "FINISH":
-                    game_state = GameState.deserialize(message)
+    client.disconnect()
 
-                if phase != "FINISH":
-                    if DEBUG:
-                        print(
-                            f"[TURN {turn}]: Getting your bot's response to {phase} phase..."
-                        )
-                    strategy = choose_strategy(is_zombie)
-
-                if phase == "CHOOSE_CLASSES":
-                    raw_possible_classes: list = message["choices"]
-                    possible_classes: list[CharacterClassType] = list(
-                        map(lambda x: CharacterClassType[x], raw_possible_classes)
-                    )
-                    num_to_pick = message["numToPick"]
-                    max_per_same_class = message["maxPerSameClass"]
-
-                    raw_output = strategy.decide_character_classes(
-                        possible_classes, num_to_pick, max_per_same_class
-                    )
-
-                    if raw_output == None:
-                        raise RuntimeError(
-                            "Your decide_character_classes strategy returned nothing (None)!"
-                        )
-
-                    output = dict()
-
-                    for [class_type, num] in raw_output.items():
-                        output[class_type.value] = num
-
-                    response = json.dumps(output)
-
-                    client.write(response)
-                elif phase == "MOVE":
-                    raw_possible_moves: dict = message["possibleMoves"]
-                    possible_moves = dict()
-
-                    for [id, possibles] in raw_possible_moves.items():
-                        actions: list[MoveAction] = list()
-                        for possible in possibles:
-                            actions.append(MoveAction.deserialize(possible))
-
-                        possible_moves[id] = actions
-
-                    output = strategy.decide_moves(possible_moves, game_state)
-
-                    if output == None:
-                        raise RuntimeError(
-                            "Your decide_moves strategy returned nothing (None)!"
-                        )
-
-                    response = json.dumps(list(map(MoveAction.serialize, output)))
-
-                    client.write(response)
-                elif phase == "ATTACK":
-                    raw_possible_attacks: dict = message["possibleAttacks"]
-                    possible_attacks = dict()
-
-                    for [id, possibles] in raw_possible_attacks.items():
-                        actions: list[AttackAction] = list()
-                        for possible in possibles:
-                            actions.append(AttackAction.deserialize(possible))
-
-                        possible_attacks[id] = actions
-
-                    output = strategy.decide_attacks(possible_attacks, game_state)
-
-                    if output == None:
-                        raise RuntimeError(
-                            "Your decide_attacks strategy returned nothing (None)!"
-                        )
-
-                    response = json.dumps(list(map(AttackAction.serialize, output)))
-
-                    client.write(response)
-                elif phase == "ABILITY":
-                    raw_possible_abilities: dict = message["possibleAbilities"]
-                    possible_abilities = dict()
-
-                    for [id, possibles] in raw_possible_abilities.items():
-                        actions: list[AbilityAction] = list()
-                        for possible in possibles:
-                            actions.append(AbilityAction.deserialize(possible))
-
-                        possible_abilities[id] = actions
-
-                    output = strategy.decide_abilities(possible_abilities, game_state)
-
-                    if output == None:
-                        raise RuntimeError(
-                            "Your decide_abilities strategy returned nothing (None)!"
-                        )
-
-                    response = json.dumps(list(map(AbilityAction.serialize, output)))
-
-                    client.write(response)
-                elif phase == "FINISH":
-                    humans_score = message["scores"]["humans"]
-                    zombies_score = message["scores"]["zombies"]
-                    humans_left = message["stats"]["humansLeft"]
-                    zombies_left = message["stats"]["zombiesLeft"]
-                    turn = message["stats"]["turns"]
-                    errors = message["errors"]
-                    your_errors = errors["zombieErrors" if is_zombie else "humanErrors"]
-                    formatted_errors = "\n".join(your_errors)
-                    formatted_errors_message = (
-                        f"Your bot had {len(your_errors)} errors:\n${formatted_errors}"
-                        if len(your_errors) > 0
-                        else "Your bot had no errors."
-                    )
-
-                    print(
-                        f"\n{formatted_errors_message}\n\n"
-                        f"Finished game on turn {turn} with {humans_left} humans and {zombies_left} zombies.\n"
-                        + f"Score: {humans_score}-{zombies_score} (H-Z). You were the {'humans' if not is_zombie else 'zombies'}."
-                    )
-                    break
-                else:
-                    raise RuntimeError(f"Unknown phase type {phase}")
-
-                if DEBUG:
-                    print(f"[TURN {turn}]: Send response to {phase} phase to server!")
-
-            except Exception as e:
-                print(f"Something went wrong running your bot: {e}", file=sys.stderr)
-                traceback.print_exc(file=sys.stderr)
-                client.write("null")
+    # Handled outside the loop so a bad FINISH message or failing stdout isn't answered with "null"
+    if finish_message is not None:
+        sys.stdout.write(format_game_summary(finish_message))
+        sys.stdout.flush()
 
 
 def main():
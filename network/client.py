@@ -1,15 +1,21 @@
 import socket
 import time
+from typing import Iterator
 
 INITIAL_TIMEOUT = 15
 SERVER_TURN_TIMEOUT = 30
+RECV_BUFFER_SIZE = 65536
+SOCKET_BUFFER_SIZE = 1 << 20
 
 
 class Client:
     def __init__(self, port_number: int) -> None:
         self.port_number = port_number
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket_file = self.socket.makefile()
+        # Messages are small and each one waits on a reply, so send them right away instead of batching
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
         self.connected = False
 
     def connect(self):
@@ -30,15 +36,43 @@ class Client:
             except ConnectionRefusedError:
                 time.sleep(1)
 
-    def read(self) -> str:
-        self.socket.settimeout(SERVER_TURN_TIMEOUT)
-        data = self.socket_file.readline().strip()
+    def frames(self) -> Iterator[bytearray]:
+        """
+        Yields each newline-delimited message from the server until it closes the connection
+        """
+        buffer = bytearray()
+
+        while True:
+            self.socket.settimeout(SERVER_TURN_TIMEOUT)
+            chunk = self.socket.recv(RECV_BUFFER_SIZE)
+
+            if not chunk:
+                # The last message may not end with a newline
+                if buffer and not buffer.isspace():
+                    yield buffer
+
+                return
+
+            # Anything already buffered has no newline in it, so only search the new chunk
+            search_from = len(buffer)
+            buffer += chunk
+            start = 0
+            end = buffer.find(b"\n", search_from)
+
+            while end != -1:
+                frame = buffer[start:end]
+
+                if frame and not frame.isspace():
+                    yield frame
+
+                start = end + 1
+                end = buffer.find(b"\n", start)
 
-        return data
+            del buffer[:start]
 
-    def write(self, message: str) -> None:
+    def write(self, message: bytes) -> None:
         self.socket.settimeout(SERVER_TURN_TIMEOUT)
-        self.socket.sendall(str.encode(message + "\n"))
+        self.socket.sendall(message + b"\n")
 
     def disconnect(self):
         self.socket.close()
@@ -0,0 +1,59 @@
+import json
+import timeit
+from typing import Callable, Optional
+
+BENCHMARK_RUNS = 50
+
+# Every JSON decoder that's installed, the optional faster libraries first and python's built in one last
+DECODERS: list[Callable[[bytes], object]] = []
+
+try:
+    import orjson
+
+    DECODERS.append(orjson.loads)
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+
+    DECODERS.append(ujson.loads)
+except ImportError:
+    pass
+
+DECODERS.append(json.loads)
+
+
+def fastest_decoder(sample: bytes) -> Callable[[bytes], object]:
+    """
+    Times each installed decoder on a sample message and returns the fastest one that can decode it
+    """
+    best_decoder = json.loads
+    best_time = None
+
+    for decoder in DECODERS:
+        try:
+            time = timeit.timeit(lambda: decoder(sample), number=BENCHMARK_RUNS)
+        except Exception:
+            # Some decoders don't accept every bytes-like type, so just skip them
+            continue
+
+        if best_time is None or time < best_time:
+            best_decoder = decoder
+            best_time = time
+
+    return best_decoder
+
+
+if orjson:
+
+    def json_dumps(obj: object, default: Optional[Callable] = None) -> bytes:
+        # orjson would otherwise encode dataclasses itself, skipping their serialize methods
+        return orjson.dumps(
+            obj, default=default, option=orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+else:
+
+    def json_dumps(obj: object, default: Optional[Callable] = None) -> bytes:
+        return json.dumps(obj, default=default).encode()
@@ -1,22 +1,62 @@
 from dataclasses import dataclass
+import sys
+from typing import Optional
 
 from game.util.assert_blob_has_key_of_type import assert_blob_has_key_of_type
 
+# msgspec is optional, but lets messages be parsed and validated straight from bytes in one pass
+try:
+    import msgspec
+
+    class RawReceivedMessage(msgspec.Struct, rename="camel"):
+        is_zombie: bool
+        phase: str
+        message: dict
+
+    decode_raw_received_message = msgspec.json.Decoder(RawReceivedMessage).decode
+except ImportError:
+    decode_raw_received_message = None
+
 
 @dataclass
 class ReceivedMessage:
     is_zombie: bool
     phase: str
     message: object
+    turn: Optional[int]
 
     def deserialize(blob: object) -> "ReceivedMessage":
         try:
             assert_blob_has_key_of_type(blob, "isZombie", bool)
             assert_blob_has_key_of_type(blob, "phase", str)
             assert_blob_has_key_of_type(blob, "message", object)
-            position = ReceivedMessage(blob["isZombie"], blob["phase"], blob["message"])
+            # Interned so comparing it to the phase names is an identity check
+            phase = sys.intern(blob["phase"])
+            message = blob["message"]
+            position = ReceivedMessage(
+                blob["isZombie"], phase, message, message.get("turn")
+            )
         except:
             print("Failed to validate ReceivedMessage json")
             raise
 
         return position
+
+    def decode(raw: bytes) -> "ReceivedMessage":
+        """
+        Decodes a message straight from the bytes the server sent, only available if msgspec is installed
+        """
+        try:
+            raw_message = decode_raw_received_message(raw)
+            message = raw_message.message
+            received_message = ReceivedMessage(
+                raw_message.is_zombie,
+                sys.intern(raw_message.phase),
+                message,
+                message.get("turn"),
+            )
+        except:
+            print("Failed to validate ReceivedMessage json")
+            raise
+
+        return received_message